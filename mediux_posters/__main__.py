@@ -1,12 +1,14 @@
-import json
 import logging
+from collections import deque
 from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from pathlib import Path
 from platform import python_version
 from typing import Annotated
 from uuid import uuid4
 
+import orjson
 from plexapi.exceptions import Unauthorized
 from typer import Abort, Context, Exit, Option, Typer
 
@@ -14,12 +16,19 @@ from mediux_posters import __version__, get_cache_root, setup_logging
 from mediux_posters.console import CONSOLE
 from mediux_posters.mediux import Mediux
 from mediux_posters.services import BaseService, Jellyfin, Plex
-from mediux_posters.services._base import BaseCollection, BaseMovie, BaseShow
+from mediux_posters.services._base import (
+    BaseCollection,
+    BaseEpisode,
+    BaseMovie,
+    BaseSeason,
+    BaseShow,
+)
 from mediux_posters.settings import Settings
-from mediux_posters.utils import MediaType, delete_folder, slugify
+from mediux_posters.utils import MAX_WORKERS, MediaType, delete_folder, slugify
 
 app = Typer()
 LOGGER = logging.getLogger("mediux-posters")
+_EMPTY: dict = {}
 
 
 @app.callback(invoke_without_command=True)
@@ -64,26 +73,30 @@ def setup(
     return settings, Mediux(), service_list
 
 
+def get_username(set_data: dict) -> str | None:
+    return (set_data.get("user_created") or _EMPTY).get("username")
+
+
 def filter_sets(
     set_list: list[dict], settings: Settings, mediux: Mediux
 ) -> Generator[dict, None, None]:
     if not set_list:
         return
 
+    sets_by_username: dict[str | None, list[dict]] = {}
+    for set_data in set_list:
+        sets_by_username.setdefault(get_username(set_data=set_data), []).append(set_data)
+
     # Yield priority usernames first
     for username in settings.priority_usernames:
-        for set_data in [
-            x for x in set_list if x.get("user_created", {}).get("username") == username
-        ]:
+        for set_data in sets_by_username.get(username, []):
             yield mediux.scrape_set(set_id=set_data.get("id"))
 
     # If allowed, yield remaining sets
     if not settings.only_priority_usernames:
+        skip_usernames = {*settings.exclude_usernames, *settings.priority_usernames}
         for set_data in set_list:
-            username = set_data.get("user_created", {}).get("username")
-            if username in settings.exclude_usernames:
-                continue
-            if settings.priority_usernames and username in settings.priority_usernames:
+            if get_username(set_data=set_data) in skip_usernames:
                 continue
             yield mediux.scrape_set(set_id=set_data.get("id"))
 
@@ -94,41 +107,170 @@ def update_posters(
     mediux: Mediux,
     service: BaseService,
     abort_on_unknown: bool = False,
+    force: bool = False,
     debug: bool = False,
 ) -> None:
     if mediux_data.get("show") and isinstance(obj, BaseShow):
-        mediux.download_show_posters(data=mediux_data, show=obj)
-        service.upload_posters(obj=obj)
-        for season in obj.seasons:
-            service.upload_posters(obj=season)
-            for episode in season.episodes:
-                service.upload_posters(obj=episode)
+        with (
+            CONSOLE.status(f"[{type(service).__name__}] Uploading {obj.display_name} posters"),
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor,
+        ):
+            uploads = {}
+
+            def upload(item: BaseShow | BaseSeason | BaseEpisode) -> None:
+                uploads[id(item)] = executor.submit(service.upload_posters, item, force)
+
+            # Start uploading each item as soon as its images are downloaded
+            mediux.download_show_posters(data=mediux_data, show=obj, on_downloaded=upload)
+            for item in (obj, *(x for season in obj.seasons for x in (season, *season.episodes))):
+                if id(item) not in uploads:
+                    upload(item=item)
+            for future in uploads.values():
+                future.result()
     elif mediux_data.get("movie") and isinstance(obj, BaseMovie):
-        mediux.download_movie_posters(data=mediux_data, movie=obj)
-        service.upload_posters(obj=obj)
+        with CONSOLE.status(f"[{type(service).__name__}] Uploading {obj.display_name} posters"):
+            mediux.download_movie_posters(data=mediux_data, movie=obj)
+            service.upload_posters(obj=obj, force=force)
     elif mediux_data.get("collection") and isinstance(obj, BaseCollection):
-        mediux.download_collection_posters(data=mediux_data, collection=obj)
-        service.upload_posters(obj=obj)
-        for movie_data in mediux_data.get("collection", {}).get("movies", []):
-            if movie := service.get_movie(tmdb_id=int(movie_data.get("id", -1))):
-                mediux.download_movie_posters(data=mediux_data, movie=movie)
-                service.upload_posters(obj=movie)
-            else:
-                LOGGER.warning(
-                    "[%s] Unable to find '%s (%s)'",
-                    type(service).__name__,
-                    movie_data.get("title"),
-                    (movie_data.get("release_date") or "0000")[:4],
-                )
+        # Upload each item in the background while the next movie is looked up and downloaded
+        with (
+            CONSOLE.status(f"[{type(service).__name__}] Uploading {obj.display_name} posters"),
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor,
+        ):
+            mediux.download_collection_posters(data=mediux_data, collection=obj)
+            uploads = [executor.submit(service.upload_posters, obj, force)]
+            for movie_data in mediux_data.get("collection", {}).get("movies", []):
+                if movie := service.get_movie(tmdb_id=int(movie_data.get("id", -1))):
+                    mediux.download_movie_posters(data=mediux_data, movie=movie)
+                    uploads.append(executor.submit(service.upload_posters, movie, force))
+                else:
+                    LOGGER.warning(
+                        "[%s] Unable to find '%s (%s)'",
+                        type(service).__name__,
+                        movie_data.get("title"),
+                        (movie_data.get("release_date") or "0000")[:4],
+                    )
+            for upload in uploads:
+                upload.result()
     else:
         LOGGER.error("Unknown data set: %s", mediux_data)
         if debug:
-            with Path(f"{uuid4()}.json").open("w") as stream:
-                json.dump(mediux_data, stream, indent=2)
+            Path(f"{uuid4()}.json").write_bytes(
+                orjson.dumps(mediux_data, option=orjson.OPT_INDENT_2)
+            )
         if abort_on_unknown:
             raise Abort
 
 
+def lookup_media(
+    service: BaseService, mediatype: MediaType | None, tmdb_id: int | None
+) -> BaseShow | BaseCollection | BaseMovie | None:
+    if mediatype == MediaType.SHOW:
+        return service.get_show(tmdb_id=tmdb_id)
+    if mediatype == MediaType.COLLECTION:
+        return service.get_collection(tmdb_id=tmdb_id)
+    if mediatype == MediaType.MOVIE:
+        return service.get_movie(tmdb_id=tmdb_id)
+    return None
+
+
+def prefetch_sets(
+    mediux: Mediux,
+    mediatype: MediaType,
+    entries: list[BaseShow] | list[BaseCollection] | list[BaseMovie],
+    executor: ThreadPoolExecutor,
+) -> Generator[list[dict], None, None]:
+    """Yield each entry's Mediux sets in order, fetching the next few in the background."""
+    pending = deque()
+    for entry in entries:
+        pending.append(
+            executor.submit(mediux.list_sets, mediatype=mediatype, tmdb_id=entry.tmdb_id)
+        )
+        if len(pending) > MAX_WORKERS:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def clean_cache(obj: BaseShow | BaseMovie | BaseCollection, service: BaseService) -> None:
+    LOGGER.info("Cleaning %s cache", obj.display_name)
+    service.forget_uploads(obj=obj)
+    delete_folder(
+        folder=get_cache_root() / "covers" / obj.mediatype.value / slugify(obj.display_name)
+    )
+    if isinstance(obj, BaseCollection):
+        for movie in obj.movies:
+            delete_folder(
+                folder=get_cache_root()
+                / "covers"
+                / movie.mediatype.value
+                / slugify(movie.display_name)
+            )
+
+
+def process_sets(
+    set_list: list[dict],
+    obj: BaseShow | BaseMovie | BaseCollection,
+    settings: Settings,
+    mediux: Mediux,
+    service: BaseService,
+    debug: bool = False,
+) -> None:
+    for set_data in filter_sets(set_list=set_list, settings=settings, mediux=mediux):
+        LOGGER.info(
+            "Downloading '%s' by '%s'", set_data.get("set_name"), get_username(set_data=set_data)
+        )
+        update_posters(mediux_data=set_data, obj=obj, mediux=mediux, service=service, debug=debug)
+        if obj.all_posters_uploaded:
+            break
+
+
+def process_urls(
+    mediatype: MediaType,
+    file: Path | None = None,
+    urls: list[str] | None = None,
+    full_clean: bool = False,
+    simple_clean: bool = False,
+    debug: bool = False,
+) -> None:
+    settings, mediux, service_list = setup(full_clean=full_clean, debug=debug)
+    url_prefix = f"{Mediux.web_url}/{mediatype.value}s"
+
+    with mediux:
+        for idx, service in enumerate(service_list):
+            CONSOLE.rule(
+                f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
+                align="left",
+                style="title",
+            )
+            url_list = [x.strip() for x in file.read_text().splitlines()] if file else urls
+            for index, entry in enumerate(url_list):
+                if not entry.startswith(url_prefix):
+                    continue
+                tmdb_id = int(entry.split("/")[-1])
+                with CONSOLE.status(f"Searching {type(service).__name__} for TMDB id: '{tmdb_id}'"):
+                    obj = lookup_media(service=service, mediatype=mediatype, tmdb_id=tmdb_id)
+                    if not obj:
+                        LOGGER.warning("[%s] Unable to find '%d'", type(service).__name__, tmdb_id)
+                        continue
+                CONSOLE.rule(
+                    f"[{index + 1}/{len(url_list)}] {obj.display_name} [{obj.tmdb_id}]",
+                    align="left",
+                    style="subtitle",
+                )
+                if simple_clean:
+                    clean_cache(obj=obj, service=service)
+                set_list = mediux.list_sets(mediatype=mediatype, tmdb_id=tmdb_id)
+                process_sets(
+                    set_list=set_list,
+                    obj=obj,
+                    settings=settings,
+                    mediux=mediux,
+                    service=service,
+                    debug=debug,
+                )
+
+
 class MediaTypeChoice(str, Enum):
     SHOW = MediaType.SHOW.value
     COLLECTION = MediaType.COLLECTION.value
@@ -194,64 +336,53 @@ def sync_posters(
     settings, mediux, service_list = setup(full_clean=full_clean, debug=debug)
     skip_mediatypes = [x.value for x in skip_mediatypes]
 
-    for idx, service in enumerate(service_list):
-        CONSOLE.rule(
-            f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
-            align="left",
-            style="title",
-        )
-        media_dict: dict[
-            MediaType,
-            Callable[[list[str] | None], list[BaseShow] | list[BaseCollection] | list[BaseMovie]],
-        ] = {
-            MediaType.SHOW: service.list_shows,
-            MediaType.COLLECTION: service.list_collections,
-            MediaType.MOVIE: service.list_movies,
-        }
-        for mediatype, func in media_dict.items():
-            if mediatype.value in skip_mediatypes:
-                continue
-            with CONSOLE.status(f"[{type(service).__name__}] Fetching {mediatype.value} media"):
-                entries = func(skip_libraries=skip_libraries)[start:end]
-            for index, entry in enumerate(entries):
-                CONSOLE.rule(
-                    f"[{index + 1}/{len(entries)}] {entry.display_name} [{entry.tmdb_id}]",
-                    align="left",
-                    style="subtitle",
-                )
-                if simple_clean:
-                    LOGGER.info("Cleaning %s cache", entry.display_name)
-                    delete_folder(
-                        folder=get_cache_root()
-                        / "covers"
-                        / entry.mediatype.value
-                        / slugify(entry.display_name)
-                    )
-                    if isinstance(entry, BaseCollection):
-                        for movie in entry.movies:
-                            delete_folder(
-                                folder=get_cache_root()
-                                / "covers"
-                                / movie.mediatype.value
-                                / slugify(movie.display_name)
-                            )
-                LOGGER.info(
-                    "[%s] Searching Mediux for '%s' sets",
-                    type(service).__name__,
-                    entry.display_name,
-                )
-                set_list = mediux.list_sets(mediatype=mediatype, tmdb_id=entry.tmdb_id)
-                for set_data in filter_sets(set_list=set_list, settings=settings, mediux=mediux):
-                    LOGGER.info(
-                        "Downloading '%s' by '%s'",
-                        set_data.get("set_name"),
-                        set_data.get("user_created", {}).get("username"),
-                    )
-                    update_posters(
-                        mediux_data=set_data, obj=entry, mediux=mediux, service=service, debug=debug
+    with mediux:
+        for idx, service in enumerate(service_list):
+            CONSOLE.rule(
+                f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
+                align="left",
+                style="title",
+            )
+            media_dict: dict[
+                MediaType,
+                Callable[
+                    [list[str] | None], list[BaseShow] | list[BaseCollection] | list[BaseMovie]
+                ],
+            ] = {
+                MediaType.SHOW: service.list_shows,
+                MediaType.COLLECTION: service.list_collections,
+                MediaType.MOVIE: service.list_movies,
+            }
+            for mediatype, func in media_dict.items():
+                if mediatype.value in skip_mediatypes:
+                    continue
+                with CONSOLE.status(f"[{type(service).__name__}] Fetching {mediatype.value} media"):
+                    entries = func(skip_libraries=skip_libraries)[start:end]
+                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    set_lists = prefetch_sets(
+                        mediux=mediux, mediatype=mediatype, entries=entries, executor=executor
                     )
-                    if entry.all_posters_uploaded:
-                        break
+                    for index, (entry, set_list) in enumerate(zip(entries, set_lists, strict=True)):
+                        CONSOLE.rule(
+                            f"[{index + 1}/{len(entries)}] {entry.display_name} [{entry.tmdb_id}]",
+                            align="left",
+                            style="subtitle",
+                        )
+                        if simple_clean:
+                            clean_cache(obj=entry, service=service)
+                        LOGGER.info(
+                            "[%s] Searching Mediux for '%s' sets",
+                            type(service).__name__,
+                            entry.display_name,
+                        )
+                        process_sets(
+                            set_list=set_list,
+                            obj=entry,
+                            settings=settings,
+                            mediux=mediux,
+                            service=service,
+                            debug=debug,
+                        )
 
 
 @app.command(
@@ -301,57 +432,14 @@ def show_posters(
         ),
     ] = False,
 ) -> None:
-    settings, mediux, service_list = setup(full_clean=full_clean, debug=debug)
-
-    for idx, service in enumerate(service_list):
-        CONSOLE.rule(
-            f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
-            align="left",
-            style="title",
-        )
-        url_list = [x.strip() for x in file.read_text().splitlines()] if file else urls
-        for index, entry in enumerate(url_list):
-            if not entry.startswith(f"{Mediux.web_url}/shows"):
-                continue
-            tmdb_id = int(entry.split("/")[-1])
-            with CONSOLE.status(f"Searching {type(service).__name__} for TMDB id: '{tmdb_id}'"):
-                obj = service.get_show(tmdb_id=tmdb_id)
-                if not obj:
-                    LOGGER.warning("[%s] Unable to find '%d'", type(service).__name__, tmdb_id)
-                    continue
-            CONSOLE.rule(
-                f"[{index + 1}/{len(url_list)}] {obj.display_name} [{obj.tmdb_id}]",
-                align="left",
-                style="subtitle",
-            )
-            if simple_clean:
-                LOGGER.info("Cleaning %s cache", obj.display_name)
-                delete_folder(
-                    folder=get_cache_root()
-                    / "covers"
-                    / obj.mediatype.value
-                    / slugify(obj.display_name)
-                )
-                if isinstance(obj, BaseCollection):
-                    for movie in obj.movies:
-                        delete_folder(
-                            folder=get_cache_root()
-                            / "covers"
-                            / movie.mediatype.value
-                            / slugify(movie.display_name)
-                        )
-            set_list = mediux.list_sets(mediatype=MediaType.SHOW, tmdb_id=tmdb_id)
-            for set_data in filter_sets(set_list=set_list, settings=settings, mediux=mediux):
-                LOGGER.info(
-                    "Downloading '%s' by '%s'",
-                    set_data.get("set_name"),
-                    set_data.get("user_created", {}).get("username"),
-                )
-                update_posters(
-                    mediux_data=set_data, obj=obj, mediux=mediux, service=service, debug=debug
-                )
-                if obj.all_posters_uploaded:
-                    break
+    process_urls(
+        mediatype=MediaType.SHOW,
+        file=file,
+        urls=urls,
+        full_clean=full_clean,
+        simple_clean=simple_clean,
+        debug=debug,
+    )
 
 
 @app.command(
@@ -402,57 +490,14 @@ def collection_posters(
         ),
     ] = False,
 ) -> None:
-    settings, mediux, service_list = setup(full_clean=full_clean, debug=debug)
-
-    for idx, service in enumerate(service_list):
-        CONSOLE.rule(
-            f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
-            align="left",
-            style="title",
-        )
-        url_list = [x.strip() for x in file.read_text().splitlines()] if file else urls
-        for index, entry in enumerate(url_list):
-            if not entry.startswith(f"{Mediux.web_url}/collections"):
-                continue
-            tmdb_id = int(entry.split("/")[-1])
-            with CONSOLE.status(f"Searching {type(service).__name__} for TMDB id: '{tmdb_id}'"):
-                obj = service.get_collection(tmdb_id=tmdb_id)
-                if not obj:
-                    LOGGER.warning("[%s] Unable to find '%d'", type(service).__name__, tmdb_id)
-                    continue
-            CONSOLE.rule(
-                f"[{index + 1}/{len(url_list)}] {obj.display_name} [{obj.tmdb_id}]",
-                align="left",
-                style="subtitle",
-            )
-            if simple_clean:
-                LOGGER.info("Cleaning %s cache", obj.display_name)
-                delete_folder(
-                    folder=get_cache_root()
-                    / "covers"
-                    / obj.mediatype.value
-                    / slugify(obj.display_name)
-                )
-                if isinstance(obj, BaseCollection):
-                    for movie in obj.movies:
-                        delete_folder(
-                            folder=get_cache_root()
-                            / "covers"
-                            / movie.mediatype.value
-                            / slugify(movie.display_name)
-                        )
-            set_list = mediux.list_sets(mediatype=MediaType.COLLECTION, tmdb_id=tmdb_id)
-            for set_data in filter_sets(set_list=set_list, settings=settings, mediux=mediux):
-                LOGGER.info(
-                    "Downloading '%s' by '%s'",
-                    set_data.get("set_name"),
-                    set_data.get("user_created", {}).get("username"),
-                )
-                update_posters(
-                    mediux_data=set_data, obj=obj, mediux=mediux, service=service, debug=debug
-                )
-                if obj.all_posters_uploaded:
-                    break
+    process_urls(
+        mediatype=MediaType.COLLECTION,
+        file=file,
+        urls=urls,
+        full_clean=full_clean,
+        simple_clean=simple_clean,
+        debug=debug,
+    )
 
 
 @app.command(
@@ -502,57 +547,14 @@ def movie_posters(
         ),
     ] = False,
 ) -> None:
-    settings, mediux, service_list = setup(full_clean=full_clean, debug=debug)
-
-    for idx, service in enumerate(service_list):
-        CONSOLE.rule(
-            f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
-            align="left",
-            style="title",
-        )
-        url_list = [x.strip() for x in file.read_text().splitlines()] if file else urls
-        for index, entry in enumerate(url_list):
-            if not entry.startswith(f"{Mediux.web_url}/movies"):
-                continue
-            tmdb_id = int(entry.split("/")[-1])
-            with CONSOLE.status(f"Searching {type(service).__name__} for TMDB id: '{tmdb_id}'"):
-                obj = service.get_movie(tmdb_id=tmdb_id)
-                if not obj:
-                    LOGGER.warning("[%s] Unable to find '%d'", type(service).__name__, tmdb_id)
-                    continue
-            CONSOLE.rule(
-                f"[{index + 1}/{len(url_list)}] {obj.display_name} [{obj.tmdb_id}]",
-                align="left",
-                style="subtitle",
-            )
-            if simple_clean:
-                LOGGER.info("Cleaning %s cache", obj.display_name)
-                delete_folder(
-                    folder=get_cache_root()
-                    / "covers"
-                    / obj.mediatype.value
-                    / slugify(obj.display_name)
-                )
-                if isinstance(obj, BaseCollection):
-                    for movie in obj.movies:
-                        delete_folder(
-                            folder=get_cache_root()
-                            / "covers"
-                            / movie.mediatype.value
-                            / slugify(movie.display_name)
-                        )
-            set_list = mediux.list_sets(mediatype=MediaType.MOVIE, tmdb_id=tmdb_id)
-            for set_data in filter_sets(set_list=set_list, settings=settings, mediux=mediux):
-                LOGGER.info(
-                    "Downloading '%s' by '%s'",
-                    set_data.get("set_name"),
-                    set_data.get("user_created", {}).get("username"),
-                )
-                update_posters(
-                    mediux_data=set_data, obj=obj, mediux=mediux, service=service, debug=debug
-                )
-                if obj.all_posters_uploaded:
-                    break
+    process_urls(
+        mediatype=MediaType.MOVIE,
+        file=file,
+        urls=urls,
+        full_clean=full_clean,
+        simple_clean=simple_clean,
+        debug=debug,
+    )
 
 
 @app.command(name="set", help="Manually set posters for specific Mediux sets using a file or URLs.")
@@ -601,76 +603,69 @@ def set_posters(
     ] = False,
 ) -> None:
     settings, mediux, service_list = setup(full_clean=full_clean, debug=debug)
+    url_prefix = f"{Mediux.web_url}/sets"
+    # Every service uses the same set data, so only scrape each set once
+    scraped: dict[int, dict] = {}
 
-    for idx, service in enumerate(service_list):
-        CONSOLE.rule(
-            f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
-            align="left",
-            style="title",
-        )
-        url_list = [x.strip() for x in file.read_text().splitlines()] if file else urls
-        for index, entry in enumerate(url_list):
-            if not entry.startswith(f"{Mediux.web_url}/sets"):
-                continue
-            set_id = int(entry.split("/")[-1])
-            set_data = mediux.scrape_set(set_id=set_id)
-            tmdb_id = (
-                (set_data.get("show") or {}).get("id")
-                or (set_data.get("collection") or {}).get("id")
-                or (set_data.get("movie") or {}).get("id")
-            )
-            if tmdb_id:
-                tmdb_id = int(tmdb_id)
-            with CONSOLE.status(
-                f"Searching {type(service).__name__} for '{set_data.get('set_name')} [{tmdb_id}]'"
-            ):
-                obj = (
-                    service.get_show(tmdb_id=tmdb_id)
-                    or service.get_collection(tmdb_id=tmdb_id)
-                    or service.get_movie(tmdb_id=tmdb_id)
-                )
-                if not obj:
-                    LOGGER.warning(
-                        "[%s] Unable to find '%s [%d]'",
-                        type(service).__name__,
-                        set_data.get("set_name"),
-                        tmdb_id,
-                    )
-                    continue
+    with mediux:
+        for idx, service in enumerate(service_list):
             CONSOLE.rule(
-                f"[{index + 1}/{len(url_list)}] {obj.display_name} [{obj.tmdb_id}]",
+                f"[{idx + 1}/{len(service_list)}] {type(service).__name__} Service",
                 align="left",
-                style="subtitle",
+                style="title",
             )
-            if simple_clean:
-                LOGGER.info("Cleaning %s cache", obj.display_name)
-                delete_folder(
-                    folder=get_cache_root()
-                    / "covers"
-                    / obj.mediatype.value
-                    / slugify(obj.display_name)
+            url_list = [x.strip() for x in file.read_text().splitlines()] if file else urls
+            for index, entry in enumerate(url_list):
+                if not entry.startswith(url_prefix):
+                    continue
+                set_id = int(entry.split("/")[-1])
+                set_data = scraped.get(set_id) or mediux.scrape_set(set_id=set_id)
+                # Don't cache failed scrapes, so the next service can retry them
+                if set_data:
+                    scraped[set_id] = set_data
+                mediatype, tmdb_id = next(
+                    (
+                        (x, int(set_data[x.value]["id"]))
+                        for x in (MediaType.SHOW, MediaType.COLLECTION, MediaType.MOVIE)
+                        if (set_data.get(x.value) or _EMPTY).get("id")
+                    ),
+                    (None, None),
                 )
-                if isinstance(obj, BaseCollection):
-                    for movie in obj.movies:
-                        delete_folder(
-                            folder=get_cache_root()
-                            / "covers"
-                            / movie.mediatype.value
-                            / slugify(movie.display_name)
+                with CONSOLE.status(
+                    f"Searching {type(service).__name__} for "
+                    f"'{set_data.get('set_name')} [{tmdb_id}]'"
+                ):
+                    obj = lookup_media(service=service, mediatype=mediatype, tmdb_id=tmdb_id)
+                    if not obj:
+                        LOGGER.warning(
+                            "[%s] Unable to find '%s [%d]'",
+                            type(service).__name__,
+                            set_data.get("set_name"),
+                            tmdb_id,
                         )
-            LOGGER.info(
-                "Downloading '%s' by '%s'",
-                set_data.get("set_name"),
-                set_data.get("user_created", {}).get("username"),
-            )
-            update_posters(
-                mediux_data=set_data,
-                obj=obj,
-                mediux=mediux,
-                service=service,
-                abort_on_unknown=True,
-                debug=debug,
-            )
+                        continue
+                CONSOLE.rule(
+                    f"[{index + 1}/{len(url_list)}] {obj.display_name} [{obj.tmdb_id}]",
+                    align="left",
+                    style="subtitle",
+                )
+                if simple_clean:
+                    clean_cache(obj=obj, service=service)
+                LOGGER.info(
+                    "Downloading '%s' by '%s'",
+                    set_data.get("set_name"),
+                    get_username(set_data=set_data),
+                )
+                update_posters(
+                    mediux_data=set_data,
+                    obj=obj,
+                    mediux=mediux,
+                    service=service,
+                    abort_on_unknown=True,
+                    # Sets are applied on request, so re-upload even if the images are unchanged
+                    force=True,
+                    debug=debug,
+                )
 
 
 if __name__ == "__main__":
@@ -1,14 +1,20 @@
 __all__ = ["Mediux"]
 
-import json
 import logging
-from json import JSONDecodeError
+import os
+import re
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from bs4 import BeautifulSoup
-from requests import get
+import orjson
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, HTTPError, ReadTimeout  # noqa: A004
 from rich.progress import Progress
+from urllib3.util.retry import Retry
 
 from mediux_posters import get_cache_root
 from mediux_posters.console import CONSOLE
@@ -19,32 +25,81 @@ from mediux_posters.services._base import (
     BaseSeason,
     BaseShow,
 )
-from mediux_posters.utils import MediaType, slugify
+from mediux_posters.utils import MAX_WORKERS, BaseModel, JsonCache, MediaType, slugify
+
+try:
+    from typing import Self  # Python >= 3.11
+except ImportError:
+    from typing_extensions import Self  # Python < 3.11
 
 LOGGER = logging.getLogger(__name__)
+MISSING_TTL = 7 * 24 * 60 * 60
+SMALL_DOWNLOAD = 8 * 1024 * 1024
+
+
+_CLEAN_PATTERN = re.compile(rb'\\\\\\"|\\|u0026')
 
 
-def parse_to_dict(input_string: str) -> dict:
+def _clean_match(match: re.Match) -> bytes:
+    return b"&" if match.group() == b"u0026" else b""
+
+
+def parse_to_dict(content: bytes) -> dict:
+    # Slice first as the cleanup never touches braces, then clean in a single pass
+    json_data = content[content.find(b"{") : content.rfind(b"}") + 1]
+    if not json_data:
+        return {}
     try:
-        clean_string = input_string.replace('\\\\\\"', "").replace("\\", "").replace("u0026", "&")
-        json_data = clean_string[clean_string.find("{") : clean_string.rfind("}") + 1]
-        return json.loads(json_data) if json_data else {}
-    except JSONDecodeError:
+        return orjson.loads(_CLEAN_PATTERN.sub(_clean_match, json_data))
+    except orjson.JSONDecodeError:
         return {}
 
 
-def _get_file_id(data: dict, file_type: str, id_key: str, id_value: str) -> str | None:
-    return next(
-        (
-            x["id"]
-            for x in data["files"]
-            if x["fileType"] == file_type
-            and id_key in x
-            and x[id_key]
-            and x[id_key]["id"] == id_value
-        ),
-        None,
-    )
+_SCRIPT_PATTERN = re.compile(rb"<script\b[^>]*>(.*?)</script\s*>", re.DOTALL | re.IGNORECASE)
+
+
+def _extract_scripts(content: bytes) -> Iterator[bytes]:
+    # Works on the raw body so the page never needs decoding
+    return (x.group(1) for x in _SCRIPT_PATTERN.finditer(content))
+
+
+_ID_KEYS = (
+    "show_id",
+    "show_id_backdrop",
+    "season_id",
+    "episode_id",
+    "movie_id",
+    "movie_id_backdrop",
+    "collection_id",
+)
+
+
+def _index_files(data: dict) -> dict[tuple[str, str], dict[str, str]]:
+    """Map (fileType, id key) to {referenced id: file id}, keeping the first file for each id."""
+    index = {}
+    for x in data.get("files", []):
+        for id_key in _ID_KEYS:
+            if isinstance(value := x.get(id_key), dict) and value.get("id"):
+                index.setdefault((x["fileType"], id_key), {}).setdefault(value["id"], x["id"])
+    return index
+
+
+def _get_file_id(
+    files: dict[tuple[str, str], dict[str, str]], file_type: str, id_key: str, id_value: str
+) -> str | None:
+    return files.get((file_type, id_key), {}).get(id_value)
+
+
+def _cover_folder(root: Path, obj: BaseShow | BaseMovie | BaseCollection) -> Path:
+    return root / obj.mediatype.value / slugify(obj.display_name)
+
+
+def _list_files(folder: Path) -> set[str]:
+    try:
+        with os.scandir(folder) as entries:
+            return {x.name for x in entries if x.is_file()}
+    except FileNotFoundError:
+        return set()
 
 
 class Mediux:
@@ -58,12 +113,43 @@ class Mediux:
             "Sec-Ch-Ua-Mobile": "?0",
             "Sec-Ch-Ua-Platform": "Windows",
         }
+        self.asset_url = f"{self.api_url}/assets/"
+        self._sets: dict[tuple[MediaType, int], list[dict]] = {}
+        self.sets_urls = {
+            x: f"{self.web_url}/{x.value}s/"
+            for x in (MediaType.SHOW, MediaType.MOVIE, MediaType.COLLECTION)
+        }
+        cache_root = get_cache_root()
+        self.covers_root = cache_root / "covers"
+        self.missing = JsonCache(file=cache_root / "mediux-missing.json")
+        self._files: tuple[dict, dict[tuple[str, str], dict[str, str]]] | None = None
+        self.session = Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+        self.missing.flush()
 
     def scrape_set(self, set_id: int) -> dict:
         set_url = f"{self.web_url}/sets/{set_id}"
 
         try:
-            response = get(set_url, timeout=30)
+            response = self.session.get(set_url, timeout=self.timeout)
             if response.status_code not in (200, 500):
                 LOGGER.error(response.text)
                 return {}
@@ -77,83 +163,135 @@ class Mediux:
             LOGGER.error("Service took too long to respond")
             return {}
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        for script in soup.find_all("script"):
-            if "files" in script.text and "set" in script.text and "Set Link\\" not in script.text:
-                return parse_to_dict(script.text).get("set", {})
+        # Error pages without set data don't need scanning
+        if b"files" not in response.content:
+            return {}
+        for script in _extract_scripts(content=response.content):
+            if b"files" in script and b"set" in script and b"Set Link\\" not in script:
+                return parse_to_dict(content=script).get("set", {})
         return {}
 
-    def _download(self, endpoint: str, output: Path) -> bool:
+    def _files_for(self, data: dict) -> dict[tuple[str, str], dict[str, str]]:
+        # A collection set is passed in again for each of its movies, so only index it once
+        if self._files is None or self._files[0] is not data:
+            self._files = (data, _index_files(data=data))
+        return self._files[1]
+
+    def _download(self, image_id: str, output: Path, progress: Progress) -> bool:
+        url = self.asset_url + image_id
         try:
-            response = get(
-                f"{self.api_url}{endpoint}", headers=self.headers, timeout=self.timeout, stream=True
-            )
+            response = self.session.get(url, timeout=self.timeout, stream=True)
             response.raise_for_status()
 
             total_length = int(response.headers.get("content-length", 0))
-            chunk_size = 1024
+            chunk_size = 64 * 1024
             LOGGER.debug("Downloading %s", output)
 
-            with Progress(console=CONSOLE) as progress:
-                task = progress.add_task(
-                    f"Downloading {output.relative_to(get_cache_root() / 'covers')}",
-                    total=total_length,
-                )
+            task = progress.add_task(
+                f"Downloading {output.relative_to(self.covers_root)}", total=total_length
+            )
+            if 0 < total_length <= SMALL_DOWNLOAD:
+                # Small enough to buffer, so write in one go and avoid leaving a partial file
+                output.write_bytes(response.content)
+                progress.update(task, advance=total_length)
+                return True
+            try:
                 with output.open("wb") as stream:
                     for chunk in response.iter_content(chunk_size=chunk_size):
                         if chunk:
                             stream.write(chunk)
                             progress.update(task, advance=len(chunk))
+            except BaseException:
+                # Cached covers are found by name alone, so don't leave a partial file behind
+                output.unlink(missing_ok=True)
+                raise
             return True
         except ConnectionError:
-            LOGGER.error("Unable to connect to '%s%s'", self.api_url, endpoint)
+            LOGGER.error("Unable to connect to '%s'", url)
         except HTTPError as err:
+            if err.response.status_code == 404:
+                # Don't request a missing asset again until the entry expires
+                self.missing.set(key=image_id, value=str(int(time.time())))
             LOGGER.error(err.response.text)
         except ReadTimeout:
             LOGGER.error("Service took too long to respond")
         return False
 
-    def _download_image(
+    def _is_missing(self, image_id: str) -> bool:
+        missed_at = self.missing.get(key=image_id)
+        return missed_at is not None and time.time() - float(missed_at) < MISSING_TTL
+
+    def _download_images(
         self,
-        obj: BaseShow | BaseSeason | BaseEpisode | BaseMovie | BaseCollection,
-        filename: str,
-        image_id: str,
-    ) -> Path | None:
-        poster_path = (
-            get_cache_root()
-            / "covers"
-            / obj.mediatype.value
-            / slugify(obj.display_name)
-            / f"{slugify(filename)}.jpg"
-        )
-        if poster_path.exists():
-            return poster_path
-        poster_path.parent.mkdir(parents=True, exist_ok=True)
-        if self._download(endpoint=f"/assets/{image_id}", output=poster_path):
-            return poster_path
-        return None
-
-    def download_show_posters(self, data: dict, show: BaseShow) -> None:
+        obj: BaseShow | BaseMovie | BaseCollection,
+        images: list[tuple[BaseModel, str, str, str]],
+        on_downloaded: Callable[[BaseModel], None] | None = None,
+    ) -> None:
+        """Download (target, field, filename, image_id) entries concurrently into obj's folder."""
+        if not images:
+            return
+        folder = _cover_folder(root=self.covers_root, obj=obj)
+        # List the cover folder once instead of checking each image individually
+        existing = _list_files(folder=folder)
+        remaining = Counter(id(x[0]) for x in images)
+
+        def resolve(target: BaseModel, field: str, path: Path | None) -> None:
+            setattr(target, field, path)
+            remaining[id(target)] -= 1
+            if on_downloaded and not remaining[id(target)]:
+                on_downloaded(target)
+
+        pending = []
+        for target, field, filename, image_id in images:
+            poster_path = folder / f"{slugify(filename)}.jpg"
+            if poster_path.name in existing:
+                resolve(target=target, field=field, path=poster_path)
+            elif self._is_missing(image_id=image_id):
+                resolve(target=target, field=field, path=None)
+            else:
+                pending.append((target, field, poster_path, image_id))
+        # Nothing to fetch, so skip the progress display and worker threads
+        if not pending:
+            return
+        folder.mkdir(parents=True, exist_ok=True)
+        with (
+            Progress(console=CONSOLE) as progress,
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor,
+        ):
+            futures = {
+                executor.submit(
+                    self._download, image_id=image_id, output=poster_path, progress=progress
+                ): (target, field, poster_path)
+                for target, field, poster_path, image_id in pending
+            }
+            for future in as_completed(futures):
+                target, field, poster_path = futures[future]
+                resolve(target=target, field=field, path=poster_path if future.result() else None)
+
+    def download_show_posters(
+        self,
+        data: dict,
+        show: BaseShow,
+        on_downloaded: Callable[[BaseShow | BaseSeason | BaseEpisode], None] | None = None,
+    ) -> None:
+        files = self._files_for(data=data)
+        images = []
         if poster_id := _get_file_id(
-            data=data, file_type="poster", id_key="show_id", id_value=str(show.tmdb_id)
+            files=files, file_type="poster", id_key="show_id", id_value=str(show.tmdb_id)
         ):
-            show.poster = self._download_image(obj=show, filename="Poster", image_id=poster_id)
+            images.append((show, "poster", "Poster", poster_id))
         if backdrop_id := _get_file_id(
-            data=data, file_type="backdrop", id_key="show_id_backdrop", id_value=str(show.tmdb_id)
+            files=files, file_type="backdrop", id_key="show_id_backdrop", id_value=str(show.tmdb_id)
         ):
-            show.backdrop = self._download_image(
-                obj=show, filename="Backdrop", image_id=backdrop_id
-            )
+            images.append((show, "backdrop", "Backdrop", backdrop_id))
 
+        # Reversed so the first entry wins when numbers are duplicated
+        seasons_by_number = {
+            int(x.get("season_number", "-1")): x
+            for x in reversed(data.get("show", {}).get("seasons", []))
+        }
         for season in show.seasons:
-            season_data = next(
-                iter(
-                    x
-                    for x in data.get("show", {}).get("seasons", [])
-                    if int(x.get("season_number", "-1")) == season.number
-                ),
-                None,
-            )
+            season_data = seasons_by_number.get(season.number)
             if not season_data:
                 LOGGER.warning(
                     "[%s] Unable to find '%s S%02d'",
@@ -163,21 +301,16 @@ class Mediux:
                 )
                 continue
             if poster_id := _get_file_id(
-                data=data, file_type="poster", id_key="season_id", id_value=season_data.get("id")
+                files=files, file_type="poster", id_key="season_id", id_value=season_data.get("id")
             ):
-                season.poster = self._download_image(
-                    obj=show, filename=f"S{season.number:02}", image_id=poster_id
-                )
+                images.append((season, "poster", f"S{season.number:02}", poster_id))
 
+            episodes_by_number = {
+                int(x.get("episode_number", "-1")): x
+                for x in reversed(season_data.get("episodes", []))
+            }
             for episode in season.episodes:
-                episode_data = next(
-                    iter(
-                        x
-                        for x in season_data.get("episodes", [])
-                        if int(x.get("episode_number", "-1")) == episode.number
-                    ),
-                    None,
-                )
+                episode_data = episodes_by_number.get(episode.number)
                 if not episode_data:
                     LOGGER.warning(
                         "[%s] Unable to find '%s S%02dE%02d'",
@@ -188,54 +321,62 @@ class Mediux:
                     )
                     continue
                 if title_card_id := _get_file_id(
-                    data=data,
+                    files=files,
                     file_type="title_card",
                     id_key="episode_id",
                     id_value=episode_data.get("id"),
                 ):
-                    episode.title_card = self._download_image(
-                        obj=show,
-                        filename=f"S{season.number:02}E{episode.number:02}",
-                        image_id=title_card_id,
+                    images.append(
+                        (
+                            episode,
+                            "title_card",
+                            f"S{season.number:02}E{episode.number:02}",
+                            title_card_id,
+                        )
                     )
 
+        self._download_images(obj=show, images=images, on_downloaded=on_downloaded)
+
     def download_movie_posters(self, data: dict, movie: BaseMovie) -> None:
+        files = self._files_for(data=data)
+        images = []
         if poster_id := _get_file_id(
-            data=data, file_type="poster", id_key="movie_id", id_value=str(movie.tmdb_id)
+            files=files, file_type="poster", id_key="movie_id", id_value=str(movie.tmdb_id)
         ):
-            movie.poster = self._download_image(obj=movie, filename="Poster", image_id=poster_id)
+            images.append((movie, "poster", "Poster", poster_id))
         if backdrop_id := _get_file_id(
-            data=data, file_type="backdrop", id_key="movie_id_backdrop", id_value=str(movie.tmdb_id)
+            files=files,
+            file_type="backdrop",
+            id_key="movie_id_backdrop",
+            id_value=str(movie.tmdb_id),
         ):
-            movie.backdrop = self._download_image(
-                obj=movie, filename="Backdrop", image_id=backdrop_id
-            )
+            images.append((movie, "backdrop", "Backdrop", backdrop_id))
+        self._download_images(obj=movie, images=images)
 
     def download_collection_posters(self, data: dict, collection: BaseCollection) -> None:
+        files = self._files_for(data=data)
+        images = []
         if poster_id := _get_file_id(
-            data=data, file_type="poster", id_key="collection_id", id_value=str(collection.tmdb_id)
+            files=files,
+            file_type="poster",
+            id_key="collection_id",
+            id_value=str(collection.tmdb_id),
         ):
-            collection.poster = self._download_image(
-                obj=collection, filename="Poster", image_id=poster_id
-            )
+            images.append((collection, "poster", "Poster", poster_id))
         if backdrop_id := next(
             (x["id"] for x in data["files"] if x["fileType"] == "backdrop"), None
         ):
-            collection.backdrop = self._download_image(
-                obj=collection, filename="Backdrop", image_id=backdrop_id
-            )
+            images.append((collection, "backdrop", "Backdrop", backdrop_id))
+        self._download_images(obj=collection, images=images)
 
     def list_sets(self, mediatype: MediaType, tmdb_id: int) -> list[dict]:
-        if mediatype == MediaType.SHOW:
-            url = f"{self.web_url}/shows/{tmdb_id}"
-        elif mediatype == MediaType.MOVIE:
-            url = f"{self.web_url}/movies/{tmdb_id}"
-        elif mediatype == MediaType.COLLECTION:
-            url = f"{self.web_url}/collections/{tmdb_id}"
-        else:
+        if mediatype not in self.sets_urls:
             raise TypeError("Unknown Mediatype")
+        if cached := self._sets.get((mediatype, tmdb_id)):
+            return cached
+        url = f"{self.sets_urls[mediatype]}{tmdb_id}"
         try:
-            response = get(url, timeout=30)
+            response = self.session.get(url, timeout=self.timeout)
             if response.status_code not in (200, 500):
                 LOGGER.error(response.text)
                 return []
@@ -249,8 +390,13 @@ class Mediux:
             LOGGER.error("Service took too long to respond")
             return []
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        for script in soup.find_all("script"):
-            if "files" in script.text and "sets" in script.text:
-                return parse_to_dict(script.text).get("sets", [])
+        if b"files" not in response.content:
+            return []
+        for script in _extract_scripts(content=response.content):
+            if b"files" in script and b"sets" in script:
+                set_list = parse_to_dict(content=script).get("sets", [])
+                # Every service asks for the same ids, so keep what was found for this run
+                if set_list:
+                    self._sets[(mediatype, tmdb_id)] = set_list
+                return set_list
         return []
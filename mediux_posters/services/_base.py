@@ -1,12 +1,13 @@
 __all__ = ["BaseCollection", "BaseEpisode", "BaseMovie", "BaseSeason", "BaseService", "BaseShow"]
 
 from abc import ABC, abstractmethod
+from functools import cached_property
 from pathlib import Path
 from typing import ClassVar, Generic, TypeVar
 
 from pydantic import Field
 
-from mediux_posters.utils import BaseModel, MediaType
+from mediux_posters.utils import BaseModel, MediaType, UploadCache
 
 
 class BaseEpisode(BaseModel):
@@ -49,7 +50,7 @@ class BaseShow(BaseModel):
     backdrop: Path | None = None
     backdrop_uploaded: bool = False
 
-    @property
+    @cached_property
     def display_name(self) -> str:
         if self.name.endswith(f"({self.year})"):
             return self.name
@@ -78,7 +79,7 @@ class BaseMovie(BaseModel):
     backdrop: Path | None = None
     backdrop_uploaded: bool = False
 
-    @property
+    @cached_property
     def display_name(self) -> str:
         if self.name.endswith(f"({self.year})"):
             return self.name
@@ -103,7 +104,7 @@ class BaseCollection(BaseModel):
     backdrop: Path | None = None
     backdrop_uploaded: bool = False
 
-    @property
+    @cached_property
     def display_name(self) -> str:
         return self.name
 
@@ -124,6 +125,8 @@ M = TypeVar("M", bound=BaseMovie)
 
 
 class BaseService(ABC, Generic[T, S, E, C, M]):
+    upload_cache: UploadCache
+
     @abstractmethod
     def list_shows(self, skip_libraries: list[str] | None = None) -> list[T]: ...
 
@@ -143,4 +146,12 @@ class BaseService(ABC, Generic[T, S, E, C, M]):
     def get_movie(self, tmdb_id: int) -> M | None: ...
 
     @abstractmethod
-    def upload_posters(self, obj: T | S | E | M | C) -> None: ...
+    def upload_posters(self, obj: T | S | E | M | C, force: bool = False) -> None: ...
+
+    def forget_uploads(self, obj: T | M | C) -> None:
+        items = [obj]
+        if isinstance(obj, BaseShow):
+            items.extend(x for season in obj.seasons for x in (season, *season.episodes))
+        elif isinstance(obj, BaseCollection):
+            items.extend(obj.movies)
+        self.upload_cache.forget(item_ids={str(x.id) for x in items})
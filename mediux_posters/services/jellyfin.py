@@ -3,21 +3,42 @@ __all__ = ["Jellyfin"]
 import logging
 import mimetypes
 from base64 import b64encode
+from collections.abc import Generator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Literal
 
-from requests import get, post
+import orjson
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import (
     ConnectionError,  # noqa: A004
     HTTPError,
     JSONDecodeError,
     ReadTimeout,
 )
+from urllib3.util.retry import Retry
 
-from mediux_posters.console import CONSOLE
+from mediux_posters import get_cache_root
 from mediux_posters.services._base import BaseEpisode, BaseMovie, BaseSeason, BaseService, BaseShow
 from mediux_posters.settings import Jellyfin as JellyfinSettings
+from mediux_posters.utils import MAX_WORKERS, JsonCache, UploadCache, hash_file
 
 LOGGER = logging.getLogger(__name__)
+# Must be a multiple of 3 so each chunk encodes without base64 padding
+ENCODE_CHUNK_SIZE = 3 * 1024 * 16
+MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+
+def _encode_image(image_file: Path) -> Generator[bytes, None, None]:
+    with image_file.open("rb") as stream:
+        while chunk := stream.read(ENCODE_CHUNK_SIZE):
+            yield b64encode(chunk)
 
 
 class Episode(BaseEpisode):
@@ -39,8 +60,31 @@ class Movie(BaseMovie):
 class Jellyfin(BaseService[Show, Season, Episode, None, Movie]):
     def __init__(self, settings: JellyfinSettings, timeout: int = 30):
         self.base_url = settings.base_url
-        self.headers = {"X-Emby-Token": settings.token}
         self.timeout = timeout
+        self._cache: dict[tuple[str, tuple[tuple[str, str], ...]], dict] = {}
+        self.upload_cache = UploadCache(file=get_cache_root() / "jellyfin-uploads.json")
+        self.item_ids = JsonCache(file=get_cache_root() / "jellyfin-ids.json")
+        self._listed: set[str] = set()
+        self._tmdb_index: dict[str, dict[int, dict]] = {}
+        self.session = Session()
+        self.session.headers.update({"X-Emby-Token": settings.token})
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=16,
+            # POST isn't retried on read/status errors as the streamed upload body can't be replayed
+            max_retries=Retry(
+                total=5,
+                connect=3,
+                read=3,
+                status=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 502, 503, 504),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def _get(
         self,
@@ -50,46 +94,55 @@ class Jellyfin(BaseService[Show, Season, Episode, None, Movie]):
     ) -> dict:
         if params is None:
             params = {}
-        if headers is None:
-            headers = self.headers
         url = f"{self.base_url}{endpoint}"
         try:
-            response = get(url=url, headers=headers, params=params, timeout=self.timeout)
+            response = self.session.get(
+                url=url, headers=headers, params=params, timeout=self.timeout
+            )
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content) if response.content else {}
         except ConnectionError:
             LOGGER.error("Unable to connect to '%s'", url)
         except HTTPError as err:
             LOGGER.error(err.response.text)
-        except JSONDecodeError:
+        except orjson.JSONDecodeError:
             LOGGER.error("Unable to parse response from '%s' as Json", url)
         except ReadTimeout:
             LOGGER.error("Service took too long to respond")
         return {}
 
+    def _get_cached(self, endpoint: str, params: dict[str, str] | None = None) -> dict:
+        key = (endpoint, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        if key not in self._cache:
+            response = self._get(endpoint=endpoint, params=params)
+            if not response:
+                return response
+            self._cache[key] = response
+        return self._cache[key]
+
     def _post(
         self,
         endpoint: str,
         params: dict[str, str] | None = None,
         headers: dict[str, str] | None = None,
-        body: bytes | dict[str, str] | None = None,
+        body: bytes | Iterable[bytes] | dict[str, str] | None = None,
     ) -> bool:
         if params is None:
             params = {}
-        if headers is None:
-            headers = self.headers
         url = f"{self.base_url}{endpoint}"
         try:
-            if isinstance(body, bytes):
-                response = post(
-                    url=url, headers=headers, params=params, timeout=self.timeout, data=body
-                )
-            elif isinstance(body, dict):
-                response = post(
+            if isinstance(body, dict):
+                response = self.session.post(
                     url=url, headers=headers, params=params, timeout=self.timeout, json=body
                 )
+            elif body is not None:
+                response = self.session.post(
+                    url=url, headers=headers, params=params, timeout=self.timeout, data=body
+                )
             else:
-                response = post(url=url, headers=headers, params=params, timeout=self.timeout)
+                response = self.session.post(
+                    url=url, headers=headers, params=params, timeout=self.timeout
+                )
             response.raise_for_status()
             return True
         except ConnectionError:
@@ -102,89 +155,98 @@ class Jellyfin(BaseService[Show, Season, Episode, None, Movie]):
             LOGGER.error("Service took too long to respond")
         return False
 
-    def _search(
-        self, library_type: Literal["tvshows", "movies"], search_id: int
-    ) -> Show | Movie | None:
-        libraries = self._get(endpoint="/Library/MediaFolders").get("Items", [])
-        libraries = [x for x in libraries if x.get("CollectionType") == library_type]
+    def _list_items(
+        self, library_type: Literal["tvshows", "movies"], skip_libraries: list[str] | None = None
+    ) -> list[dict]:
+        if skip_libraries is None:
+            skip_libraries = []
+        libraries = self._get_cached(endpoint="/Library/MediaFolders").get("Items", [])
+        libraries = [
+            x
+            for x in libraries
+            if x.get("CollectionType") == library_type and x.get("Name") not in skip_libraries
+        ]
 
+        output = []
         for library in libraries:
-            for show in self._get(
+            items = self._get_cached(
                 endpoint="/Items",
                 params={
                     "hasTmdbId": True,
                     "fields": ["ProviderIds"],
                     "ParentId": library.get("Id"),
                     "Recursive": True,
-                    "IncludeItemTypes": "Series",
+                    "IncludeItemTypes": "Series" if library_type == "tvshows" else "Movie",
                 },
-            ).get("Items", []):
-                tmdb_id = self.extract_tmdb(entry=show)
-                if not tmdb_id or tmdb_id != search_id:
-                    continue
-                return self._parse_show(show_data=show)
-            for movie in self._get(
-                endpoint="/Items",
-                params={
-                    "hasTmdbId": True,
-                    "fields": ["ProviderIds"],
-                    "ParentId": library.get("Id"),
-                    "Recursive": True,
-                    "IncludeItemTypes": "Movie",
-                },
-            ).get("Items", []):
-                tmdb_id = self.extract_tmdb(entry=movie)
-                if not tmdb_id or tmdb_id != search_id:
-                    continue
-                return self._parse_movie(movie=movie)
+            ).get("Items", [])
+            output.extend(x for x in items if self.extract_tmdb(entry=x))
+        self._listed.add(library_type)
+        return output
+
+    def _parse_item(self, item: dict) -> Show | Movie | None:
+        if item.get("Type") == "Series":
+            return self._parse_show(show_data=item)
+        if item.get("Type") == "Movie":
+            return self._parse_movie(movie=item)
         return None
 
+    def _search(
+        self, library_type: Literal["tvshows", "movies"], search_id: int
+    ) -> Show | Movie | None:
+        # Reuse the item found on a previous run, if it still exists with the same TMDB id.
+        # Once the libraries are listed this run, the in-memory index is cheaper.
+        cache_key = f"{library_type}/{search_id}"
+        if library_type not in self._listed and (item_id := self.item_ids.get(key=cache_key)):
+            item = next(
+                iter(
+                    self._get(
+                        endpoint="/Items", params={"ids": item_id, "fields": ["ProviderIds"]}
+                    ).get("Items", [])
+                ),
+                None,
+            )
+            if item and self.extract_tmdb(entry=item) == search_id:
+                return self._parse_item(item=item)
+
+        if library_type not in self._tmdb_index:
+            index = {}
+            for item in self._list_items(library_type=library_type):
+                index.setdefault(self.extract_tmdb(entry=item), item)
+            self._tmdb_index[library_type] = index
+        item = self._tmdb_index[library_type].get(search_id)
+        if item is None:
+            return None
+        self.item_ids.set(key=cache_key, value=item["Id"])
+        return self._parse_item(item=item)
+
     def _parse_show(self, show_data: dict) -> Show:
         show = Show(
             id=show_data["Id"],
             name=show_data["Name"],
-            year=show_data["ProductionYear"],
+            year=show_data.get("ProductionYear", 0),
             tmdb_id=self.extract_tmdb(entry=show_data),
         )
+        episodes_by_season: dict[str, list[dict]] = {}
+        for episode_data in self._get(endpoint=f"/Shows/{show.id}/Episodes").get("Items", []):
+            episodes_by_season.setdefault(episode_data.get("SeasonId"), []).append(episode_data)
         for season_data in self._get(endpoint=f"/Shows/{show.id}/Seasons").get("Items", []):
-            season = Season(id=season_data["Id"], number=season_data["IndexNumber"])
-            for episode_data in self._get(
-                endpoint=f"/Shows/{show.id}/Episodes", params={"seasonId": season.id}
-            ).get("Items", []):
+            # Ids and numbers come straight from Jellyfin's Json, so skip revalidating them
+            season = Season.model_construct(id=season_data["Id"], number=season_data["IndexNumber"])
+            for episode_data in episodes_by_season.get(season.id, []):
                 if "IndexNumber" not in episode_data:
                     continue
-                episode = Episode(id=episode_data["Id"], number=episode_data["IndexNumber"])
+                episode = Episode.model_construct(
+                    id=episode_data["Id"], number=episode_data["IndexNumber"]
+                )
                 season.episodes.append(episode)
             show.seasons.append(season)
         return show
 
     def list_shows(self, skip_libraries: list[str] | None = None) -> list[Show]:
-        if skip_libraries is None:
-            skip_libraries = []
-        libraries = self._get(endpoint="/Library/MediaFolders").get("Items", [])
-        libraries = [
-            x
-            for x in libraries
-            if x.get("CollectionType") == "tvshows" and x.get("Name") not in skip_libraries
-        ]
-
-        output = []
-        for library in libraries:
-            for show in self._get(
-                endpoint="/Items",
-                params={
-                    "hasTmdbId": True,
-                    "fields": ["ProviderIds"],
-                    "ParentId": library.get("Id"),
-                    "Recursive": True,
-                    "IncludeItemTypes": "Series",
-                },
-            ).get("Items", []):
-                tmdb_id = self.extract_tmdb(entry=show)
-                if not tmdb_id:
-                    continue
-                output.append(self._parse_show(show_data=show))
-        return output
+        show_list = self._list_items(library_type="tvshows", skip_libraries=skip_libraries)
+        # Each show needs its own season/episode requests, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            return list(executor.map(self._parse_show, show_list))
 
     def get_show(self, tmdb_id: int) -> Show | None:
         return self._search(library_type="tvshows", search_id=tmdb_id)
@@ -193,38 +255,16 @@ class Jellyfin(BaseService[Show, Season, Episode, None, Movie]):
         return Movie(
             id=movie["Id"],
             name=movie["Name"],
-            year=movie["ProductionYear"],
+            year=movie.get("ProductionYear", 0),
             tmdb_id=self.extract_tmdb(entry=movie),
         )
 
     def list_movies(self, skip_libraries: list[str] | None = None) -> list[Movie]:
-        if skip_libraries is None:
-            skip_libraries = []
-        libraries = self._get(endpoint="/Library/MediaFolders").get("Items", [])
-        libraries = [
-            x
-            for x in libraries
-            if x.get("CollectionType") == "tvshows" and x.get("Name") not in skip_libraries
+        return [
+            self._parse_movie(movie=x)
+            for x in self._list_items(library_type="movies", skip_libraries=skip_libraries)
         ]
 
-        output = []
-        for library in libraries:
-            for movie in self._get(
-                endpoint="/Items",
-                params={
-                    "hasTmdbId": True,
-                    "fields": ["ProviderIds"],
-                    "ParentId": library.get("Id"),
-                    "Recursive": True,
-                    "IncludeItemTypes": "Movie",
-                },
-            ).get("Items", []):
-                tmdb_id = self.extract_tmdb(entry=movie)
-                if not tmdb_id:
-                    continue
-                output.append(self._parse_movie(movie=movie))
-        return output
-
     def get_movie(self, tmdb_id: int) -> Movie | None:
         return self._search(library_type="movies", search_id=tmdb_id)
 
@@ -234,7 +274,9 @@ class Jellyfin(BaseService[Show, Season, Episode, None, Movie]):
     def get_collection(self, tmdb_id: int) -> None:  # noqa: ARG002
         return None
 
-    def upload_posters(self, obj: Show | Season | Episode | Movie | None) -> None:
+    def upload_posters(
+        self, obj: Show | Season | Episode | Movie | None, force: bool = False
+    ) -> None:
         if isinstance(obj, Show | Movie):
             options = [
                 (obj.poster, "poster_uploaded", "Primary"),
@@ -248,30 +290,41 @@ class Jellyfin(BaseService[Show, Season, Episode, None, Movie]):
             LOGGER.warning("Updating %s posters aren't supported", type(obj).__name__)
             return
         for image_file, field, image_type in options:
-            if not image_file or not image_file.exists() or getattr(obj, field):
+            if not image_file or getattr(obj, field):
+                continue
+            # hash_file stats the image anyway, so use that as the existence check
+            try:
+                file_hash = hash_file(file=image_file)
+            except FileNotFoundError:
                 continue
-            with CONSOLE.status(
-                rf"\[Jellyfin] Uploading {image_file.parent.name}/{image_file.name}"
+            cache_key = f"{obj.id}/{image_type}"
+            if not force and self.upload_cache.is_uploaded(key=cache_key, file_hash=file_hash):
+                LOGGER.debug(
+                    "[Jellyfin] Skipping '%s/%s', already uploaded",
+                    image_file.parent.name,
+                    image_file.name,
+                )
+                setattr(obj, field, True)
+                continue
+            # Uploads run on worker threads, so log instead of starting a Live display
+            LOGGER.info("[Jellyfin] Uploading '%s/%s'", image_file.parent.name, image_file.name)
+            mime_type = (
+                MIME_TYPES.get(image_file.suffix.lower())
+                or mimetypes.guess_type(image_file.name)[0]
+                or "image/jpeg"
+            )
+            headers = {"Content-Type": mime_type}
+            if not self._post(
+                endpoint=f"/Items/{obj.id}/Images/{image_type}",
+                headers=headers,
+                body=_encode_image(image_file=image_file),
             ):
-                mime_type, _ = mimetypes.guess_type(image_file)
-                if not mime_type:
-                    mime_type = "image/jpeg"
-                headers = self.headers
-                headers["Content-Type"] = mime_type
-                with image_file.open("rb") as stream:
-                    image_data = b64encode(stream.read())
-                if not self._post(
-                    endpoint=f"/Items/{obj.id}/Images/{image_type}",
-                    headers=headers,
-                    body=image_data,
-                ):
-                    LOGGER.error(
-                        "[Jellyfin] Failed to upload '%s/%s'",
-                        image_file.parent.name,
-                        image_file.name,
-                    )
-                else:
-                    setattr(obj, field, True)
+                LOGGER.error(
+                    "[Jellyfin] Failed to upload '%s/%s'", image_file.parent.name, image_file.name
+                )
+            else:
+                setattr(obj, field, True)
+                self.upload_cache.mark_uploaded(key=cache_key, file_hash=file_hash)
 
     @classmethod
     def extract_tmdb(cls, entry: dict) -> int | None:
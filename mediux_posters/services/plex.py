@@ -1,10 +1,13 @@
 __all__ = ["Plex"]
 
 import logging
+from collections.abc import Iterator
+from functools import cached_property
 from typing import Literal
 
 from plexapi.collection import Collection as PlexCollection
 from plexapi.exceptions import BadRequest
+from plexapi.library import LibrarySection
 from plexapi.server import PlexServer
 from plexapi.video import (
     Episode as PlexEpisode,
@@ -12,10 +15,12 @@ from plexapi.video import (
     Season as PlexSeason,
     Show as PlexShow,
 )
+from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, HTTPError, ReadTimeout  # noqa: A004
+from urllib3.util.retry import Retry
 
 from mediux_posters import get_cache_root
-from mediux_posters.console import CONSOLE
 from mediux_posters.services._base import (
     BaseCollection,
     BaseEpisode,
@@ -25,6 +30,7 @@ from mediux_posters.services._base import (
     BaseShow,
 )
 from mediux_posters.settings import Plex as PlexSettings
+from mediux_posters.utils import UploadCache, hash_file
 
 LOGGER = logging.getLogger(__name__)
 
@@ -50,14 +56,46 @@ class Collection(BaseCollection, arbitrary_types_allowed=True):
 
 
 class Plex(BaseService[Show, Season, Episode, Collection, Movie]):
-    def __init__(self, settings: PlexSettings):
-        self.session = PlexServer(settings.base_url, settings.token)
+    def __init__(self, settings: PlexSettings, timeout: int = 30):
+        # Uploads run from several threads, so pool enough connections to reuse them all
+        self._http = Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=16,
+            # Let the final response reach plexapi's own status handling once retries run out
+            max_retries=Retry(
+                total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), raise_on_status=False
+            ),
+        )
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        self.session = PlexServer(
+            settings.base_url, settings.token, session=self._http, timeout=timeout
+        )
+        self._library_cache: dict[tuple[str, bool], list] = {}
+        self._tmdb_index: dict[
+            tuple[str, bool], dict[int, PlexShow | PlexMovie | PlexCollection]
+        ] = {}
+        self.upload_cache = UploadCache(file=get_cache_root() / "plex-uploads.json")
+
+    @cached_property
+    def sections(self) -> list[LibrarySection]:
+        return self.session.library.sections()
+
+    def _library_items(
+        self, library: LibrarySection, collections: bool = False
+    ) -> list[PlexShow] | list[PlexMovie] | list[PlexCollection]:
+        # Lookups scan whole libraries, so only list each one once per run
+        key = (library.key, collections)
+        if key not in self._library_cache:
+            self._library_cache[key] = library.collections() if collections else library.all()
+        return self._library_cache[key]
 
     @classmethod
     def extract_tmdb(cls, entry: PlexShow | PlexMovie | PlexCollection) -> int | None:
         if isinstance(entry, PlexCollection):
             return next(
-                iter(
+                (
                     int(x.tag.casefold().removeprefix("tmdb-"))
                     for x in entry.labels
                     if x.tag.casefold().startswith("tmdb-")
@@ -65,36 +103,44 @@ class Plex(BaseService[Show, Season, Episode, Collection, Movie]):
                 None,
             )
         return next(
-            iter(
-                int(x.id.removeprefix("tmdb://")) for x in entry.guids if x.id.startswith("tmdb://")
-            ),
+            (int(x.id.removeprefix("tmdb://")) for x in entry.guids if x.id.startswith("tmdb://")),
             None,
         )
 
+    def _list_items(
+        self,
+        library_type: Literal["movie", "show"],
+        skip_libraries: list[str] | None = None,
+        collections: bool = False,
+    ) -> Iterator[PlexShow | PlexMovie | PlexCollection]:
+        if skip_libraries is None:
+            skip_libraries = []
+        return (
+            x
+            for library in self.sections
+            if library.type == library_type and library.title not in skip_libraries
+            for x in self._library_items(library=library, collections=collections)
+        )
+
     def _search(
         self, library_type: Literal["movie", "show", "collection"], search_id: int
     ) -> Show | Movie | Collection | None:
-        for library in self.session.library.sections():
-            if library.type == "show" and library.type == library_type:
-                for show in library.all():
-                    tmdb_id = self.extract_tmdb(entry=show)
-                    if not tmdb_id or tmdb_id != search_id:
-                        continue
-                    return self._parse_show(plex_show=show)
-            elif library.type == "movie" and library_type in (library.type, "collection"):
-                if library_type == "movie":
-                    for movie in library.all():
-                        tmdb_id = self.extract_tmdb(entry=movie)
-                        if not tmdb_id or tmdb_id != search_id:
-                            continue
-                        return self._parse_movie(movie=movie)
-                elif library_type == "collection":
-                    for collection in library.collections():
-                        tmdb_id = self.extract_tmdb(entry=collection)
-                        if not tmdb_id or tmdb_id != search_id:
-                            continue
-                        return self._parse_collection(collection=collection)
-        return None
+        key = ("show" if library_type == "show" else "movie", library_type == "collection")
+        # Index every item by TMDB id on the first search, so later searches are dict lookups
+        if key not in self._tmdb_index:
+            index = {}
+            for x in self._list_items(library_type=key[0], collections=key[1]):
+                if (tmdb_id := self.extract_tmdb(entry=x)) is not None:
+                    index.setdefault(tmdb_id, x)
+            self._tmdb_index[key] = index
+        item = self._tmdb_index[key].get(search_id)
+        if item is None:
+            return None
+        if library_type == "show":
+            return self._parse_show(plex_show=item)
+        if library_type == "collection":
+            return self._parse_collection(collection=item)
+        return self._parse_movie(movie=item)
 
     def _parse_show(self, plex_show: PlexShow) -> Show:
         show = Show(
@@ -104,9 +150,13 @@ class Plex(BaseService[Show, Season, Episode, Collection, Movie]):
             tmdb_id=self.extract_tmdb(entry=plex_show),
             plex=plex_show,
         )
+        # Fetch every episode in one allLeaves request instead of one request per season
+        episodes_by_season: dict[int, list[PlexEpisode]] = {}
+        for plex_episode in show.plex.episodes():
+            episodes_by_season.setdefault(plex_episode.parentRatingKey, []).append(plex_episode)
         for plex_season in show.plex.seasons():
             season = Season(id=plex_season.ratingKey, number=plex_season.index, plex=plex_season)
-            for plex_episode in season.plex.episodes():
+            for plex_episode in episodes_by_season.get(plex_season.ratingKey, []):
                 episode = Episode(
                     id=plex_episode.ratingKey, number=plex_episode.index, plex=plex_episode
                 )
@@ -115,17 +165,11 @@ class Plex(BaseService[Show, Season, Episode, Collection, Movie]):
         return show
 
     def list_shows(self, skip_libraries: list[str] | None = None) -> list[Show]:
-        if skip_libraries is None:
-            skip_libraries = []
-        output = []
-        for library in self.session.library.sections():
-            if library.type == "show" and library.title not in skip_libraries:
-                for show in library.all():
-                    tmdb_id = self.extract_tmdb(entry=show)
-                    if not tmdb_id:
-                        continue
-                    output.append(self._parse_show(plex_show=show))
-        return output
+        return [
+            self._parse_show(plex_show=x)
+            for x in self._list_items(library_type="show", skip_libraries=skip_libraries)
+            if self.extract_tmdb(entry=x)
+        ]
 
     def get_show(self, tmdb_id: int) -> Show | None:
         return self._search(library_type="show", search_id=tmdb_id)
@@ -140,17 +184,11 @@ class Plex(BaseService[Show, Season, Episode, Collection, Movie]):
         )
 
     def list_movies(self, skip_libraries: list[str] | None = None) -> list[Movie]:
-        if skip_libraries is None:
-            skip_libraries = []
-        output = []
-        for library in self.session.library.sections():
-            if library.type == "movie" and library.title not in skip_libraries:
-                for movie in library.all():
-                    tmdb_id = self.extract_tmdb(entry=movie)
-                    if not tmdb_id:
-                        continue
-                    output.append(self._parse_movie(movie=movie))
-        return output
+        return [
+            self._parse_movie(movie=x)
+            for x in self._list_items(library_type="movie", skip_libraries=skip_libraries)
+            if self.extract_tmdb(entry=x)
+        ]
 
     def get_movie(self, tmdb_id: int) -> Movie | None:
         return self._search(library_type="movie", search_id=tmdb_id)
@@ -164,22 +202,20 @@ class Plex(BaseService[Show, Season, Episode, Collection, Movie]):
         )
 
     def list_collections(self, skip_libraries: list[str] | None = None) -> list[Collection]:
-        if skip_libraries is None:
-            skip_libraries = []
-        output = []
-        for library in self.session.library.sections():
-            if library.type == "movie" and library.title not in skip_libraries:
-                for collection in library.collections():
-                    tmdb_id = self.extract_tmdb(entry=collection)
-                    if not tmdb_id:
-                        continue
-                    output.append(self._parse_collection(collection=collection))
-        return output
+        return [
+            self._parse_collection(collection=x)
+            for x in self._list_items(
+                library_type="movie", skip_libraries=skip_libraries, collections=True
+            )
+            if self.extract_tmdb(entry=x)
+        ]
 
     def get_collection(self, tmdb_id: int) -> Collection | None:
         return self._search(library_type="collection", search_id=tmdb_id)
 
-    def upload_posters(self, obj: Show | Season | Episode | Movie | Collection) -> None:
+    def upload_posters(
+        self, obj: Show | Season | Episode | Movie | Collection, force: bool = False
+    ) -> None:
         if isinstance(obj, Show | Movie | Collection):
             options = [
                 (obj.poster, "poster_uploaded", obj.plex.uploadPoster),
@@ -193,15 +229,31 @@ class Plex(BaseService[Show, Season, Episode, Collection, Movie]):
             LOGGER.warning("Updating %s posters aren't supported", type(obj).__name__)
             return
         for image_file, field, func in options:
-            if not image_file or not image_file.exists() or getattr(obj, field):
+            if not image_file or getattr(obj, field):
+                continue
+            # hash_file stats the image anyway, so use that as the existence check
+            try:
+                file_hash = hash_file(file=image_file)
+            except FileNotFoundError:
                 continue
-            with CONSOLE.status(rf"\[Plex] Uploading {image_file.parent.name}/{image_file.name}"):
-                try:
-                    func(filepath=str(image_file))
-                    setattr(obj, field, True)
-                except (ConnectionError, HTTPError, ReadTimeout, BadRequest) as err:
-                    LOGGER.error(
-                        "[Plex] Failed to upload %s: %s",
-                        image_file.relative_to(get_cache_root() / "covers"),
-                        err,
-                    )
+            cache_key = f"{obj.id}/{field}"
+            if not force and self.upload_cache.is_uploaded(key=cache_key, file_hash=file_hash):
+                LOGGER.debug(
+                    "[Plex] Skipping '%s/%s', already uploaded",
+                    image_file.parent.name,
+                    image_file.name,
+                )
+                setattr(obj, field, True)
+                continue
+            # Uploads run on worker threads, so log instead of starting a Live display
+            LOGGER.info("[Plex] Uploading '%s/%s'", image_file.parent.name, image_file.name)
+            try:
+                func(filepath=str(image_file))
+                setattr(obj, field, True)
+                self.upload_cache.mark_uploaded(key=cache_key, file_hash=file_hash)
+            except (ConnectionError, HTTPError, ReadTimeout, BadRequest) as err:
+                LOGGER.error(
+                    "[Plex] Failed to upload %s: %s",
+                    image_file.relative_to(get_cache_root() / "covers"),
+                    err,
+                )
@@ -67,10 +67,13 @@ class Settings(BaseModel):
         return cls(**content)
 
     def save(self) -> None:
-        with self._file.open("wb") as stream:
-            content = self.model_dump(by_alias=False)
-            content = _stringify_values(content=content)
-            tomlwriter.dump(content, stream)
+        content = self.model_dump(by_alias=False)
+        content = _stringify_values(content=content)
+        data = tomlwriter.dumps(content).encode("utf-8")
+        # Skip the write if the file on disk is already up to date
+        if self._file.exists() and self._file.read_bytes() == data:
+            return
+        self._file.write_bytes(data)
 
     @classmethod
     def display(cls) -> None:
@@ -1,18 +1,37 @@
-__all__ = ["BaseModel", "MediaType", "blank_is_none", "delete_folder", "flatten_dict", "slugify"]
-
+__all__ = [
+    "MAX_WORKERS",
+    "BaseModel",
+    "JsonCache",
+    "MediaType",
+    "UploadCache",
+    "blank_is_none",
+    "delete_folder",
+    "flatten_dict",
+    "hash_file",
+    "slugify",
+]
+
+import atexit
+import hashlib
 import logging
 import re
 import unicodedata
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
+from threading import Lock
 from typing import Any
 
+import orjson
 from pydantic import BaseModel as PydanticModel
 from rich.panel import Panel
 
 from mediux_posters.console import CONSOLE
 
 LOGGER = logging.getLogger(__name__)
+MAX_WORKERS = 8
+# Number of changes a cache keeps in memory before writing them to disk
+FLUSH_EVERY = 100
 
 
 class BaseModel(
@@ -38,6 +57,7 @@ class MediaType(str, Enum):
     COLLECTION = "collection"
 
 
+@lru_cache(maxsize=4096)
 def slugify(value: str) -> str:
     value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
     value = re.sub(r"[^\w\s-]", "", value.lower())
@@ -73,3 +93,74 @@ def flatten_dict(content: dict[str, Any], parent_key: str = "") -> dict[str, Any
 def blank_is_none(value: str) -> str | None:
     """Enforces blank strings to be None."""
     return value if value else None
+
+
+def hash_file(file: Path) -> str:
+    stat = file.stat()
+    return _hash_file(file=file, modified=stat.st_mtime_ns, size=stat.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _hash_file(file: Path, modified: int, size: int) -> str:  # noqa: ARG001
+    digest = hashlib.sha256()
+    with file.open("rb") as stream:
+        while chunk := stream.read(1 << 16):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JsonCache:
+    """A string key/value store persisted as Json in a single file, written in batches."""
+
+    def __init__(self, file: Path):
+        self.file = file
+        self._lock = Lock()
+        self._pending = 0
+        try:
+            self._content: dict[str, str] = orjson.loads(file.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            self._content = {}
+        atexit.register(self.flush)
+
+    def get(self, key: str) -> str | None:
+        return self._content.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            if self._content.get(key) == value:
+                return
+            self._content[key] = value
+            self._pending += 1
+            if self._pending >= FLUSH_EVERY:
+                self._write()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._write()
+
+    def _write(self) -> None:
+        # Swap in a fully written temp file, so a crash can't leave truncated Json behind
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.file.with_name(f"{self.file.name}.tmp")
+        temp_file.write_bytes(orjson.dumps(self._content))
+        temp_file.replace(self.file)
+        self._pending = 0
+
+
+class UploadCache(JsonCache):
+    """Remembers the hash of the last image uploaded to each item."""
+
+    def is_uploaded(self, key: str, file_hash: str) -> bool:
+        return self.get(key=key) == file_hash
+
+    def mark_uploaded(self, key: str, file_hash: str) -> None:
+        self.set(key=key, value=file_hash)
+
+    def forget(self, item_ids: set[str]) -> None:
+        """Drop the stored hashes of the given items, so their images are uploaded again."""
+        with self._lock:
+            keys = [x for x in self._content if x.split("/", 1)[0] in item_ids]
+            for key in keys:
+                del self._content[key]
+            self._pending += len(keys)